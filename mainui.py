@@ -1,46 +1,165 @@
 import sys
 import os
-import random
+from pathlib import Path
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, 
                             QWidget, QLabel, QFileDialog, QTextEdit, QDialog, QLineEdit, 
                             QFormLayout, QMessageBox, QGroupBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QSettings, QThreadPool, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
 
+# Default and config paths, resolved once at import
+_HOME = os.path.expanduser('~')
+_DEFAULT_INPUT = os.path.join(_HOME, 'Pictures')
+_DEFAULT_OUTPUT = os.path.join(_HOME, 'Documents/TextRecognition')
+_CONFIG_DIR = os.path.join(_HOME, '.config/text_recognition')
+_CONFIG_FILE = os.path.join(_CONFIG_DIR, 'settings.conf')
+
+# Create the config directory up front so saving settings doesn't have to
+try:
+    os.makedirs(_CONFIG_DIR, exist_ok=True)
+except OSError:
+    pass
+
+# File dialog filters and options, built once
+_IMAGE_FILTER = "Image Files (*.png *.jpg *.jpeg *.bmp *.tiff);;All Files (*)"
+_TEXT_FILTER = "Text Files (*.txt);;All Files (*)"
+_FD_OPTIONS = QFileDialog.Options()
+# Image browser is read-only and skips custom folder icons. Both flags only
+# affect Qt's own dialog widget; the native dialog ignores them.
+_IMAGE_FD_OPTIONS = QFileDialog.DontUseCustomDirectoryIcons | QFileDialog.ReadOnly
+
+# Placeholder recognition output
+LOREM_PARAGRAPHS = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Nullam in dui mauris. Vivamus hendrerit arcu sed erat molestie vehicula. Sed auctor neque eu tellus rhoncus ut eleifend nibh porttitor.",
+    "Ut in nulla enim. Phasellus molestie magna non est bibendum non venenatis nisl tempor. Suspendisse dictum feugiat nisl ut dapibus. Mauris iaculis porttitor posuere.",
+    "Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium, totam rem aperiam, eaque ipsa quae ab illo inventore veritatis et quasi architecto beatae vitae dicta sunt explicabo.",
+    "Nemo enim ipsam voluptatem quia voluptas sit aspernatur aut odit aut fugit, sed quia consequuntur magni dolores eos qui ratione voluptatem sequi nesciunt.",
+)
+
+
+def _migrate_legacy_settings(qs):
+    # Older versions wrote settings.conf as raw key=value lines with no INI
+    # section. QSettings would read those values with INI escaping (commas
+    # split into lists, backslashes as escapes), so read them the old way and
+    # rewrite them in QSettings' own format. Files QSettings has written
+    # always start with a [General] section, so only the first line is read
+    # unless the file is still in the old format.
+    try:
+        with open(_CONFIG_FILE, "r") as f:
+            first_line = f.readline()
+            if not first_line or first_line.startswith("["):
+                return
+            lines = [first_line] + f.read().splitlines()
+    except (OSError, ValueError):
+        # Missing or undecodable file; QSettings and the defaults take over
+        return
+    
+    for line in lines:
+        key, sep, value = line.strip().partition("=")
+        if sep and key in ('input_dir', 'output_dir'):
+            qs.setValue(key, value)
+    qs.sync()
+
+
+def load_settings_from_disk():
+    # Saved settings, falling back to the defaults for anything not yet saved
+    # or that can't be read back as a path
+    qs = QSettings(_CONFIG_FILE, QSettings.IniFormat)
+    _migrate_legacy_settings(qs)
+    
+    settings = {}
+    for key, default in (('input_dir', _DEFAULT_INPUT), ('output_dir', _DEFAULT_OUTPUT)):
+        try:
+            settings[key] = qs.value(key, default, type=str)
+        except Exception:
+            # Value stored in a form that isn't a plain string (e.g. a list)
+            settings[key] = default
+    return settings
+
+
+class _WriteJobSignals(QObject):
+    # Emitted with the file path on success, or the error message on failure
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+
+class _WriteJob(QRunnable):
+    """Writes a text file on a worker thread so the UI stays responsive."""
+    
+    def __init__(self, path, text):
+        super().__init__()
+        self.path = path
+        self.text = text
+        self.signals = _WriteJobSignals()
+    
+    def run(self):
+        try:
+            # Write directly; only create the directory if the write says it's missing
+            path = Path(self.path)
+            try:
+                path.write_text(self.text)
+            except FileNotFoundError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(self.text)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(self.path)
+
+
+class _DirCheckSignals(QObject):
+    # Emitted with the checked path and whether it is an existing directory
+    result = pyqtSignal(str, bool)
+
+
+class _DirCheckJob(QRunnable):
+    """Checks whether a path is a directory on a worker thread."""
+    
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = _DirCheckSignals()
+    
+    def run(self):
+        self.signals.result.emit(self.path, os.path.isdir(self.path))
+
+
 class SettingsDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, initial_settings=None):
         super(SettingsDialog, self).__init__(parent)
         self.setWindowTitle("Settings")
         self.setMinimumWidth(400)
         self.setMinimumHeight(200)
         
-        # Load current settings or use defaults
-        self.settings = {
-            'input_dir': os.path.expanduser('~/Pictures'),
-            'output_dir': os.path.expanduser('~/Documents/TextRecognition')
-        }
+        # Use the caller's settings if given, otherwise load them from disk
+        self.settings = initial_settings if initial_settings is not None else load_settings_from_disk()
+        self.qs = QSettings(_CONFIG_FILE, QSettings.IniFormat)
         
-        # Try to load previous settings if they exist
-        self.load_settings()
+        # Output directory created by the last save, reported by the main window
+        self.created_output_dir = None
         
         # Create form layout
         layout = QFormLayout()
         
-        # Input directory settings
-        input_layout = QHBoxLayout()
-        self.input_dir_edit = QLineEdit(self.settings['input_dir'])
-        input_browse_btn = QPushButton("Browse...")
-        input_browse_btn.clicked.connect(self.browse_input_dir)
-        input_layout.addWidget(self.input_dir_edit)
-        input_layout.addWidget(input_browse_btn)
-        
-        # Output directory settings
-        output_layout = QHBoxLayout()
-        self.output_dir_edit = QLineEdit(self.settings['output_dir'])
-        output_browse_btn = QPushButton("Browse...")
-        output_browse_btn.clicked.connect(self.browse_output_dir)
-        output_layout.addWidget(self.output_dir_edit)
-        output_layout.addWidget(output_browse_btn)
+        # Directory row: a path field with a browse button beside it
+        def _make_dir_row(initial, slot):
+            row_layout = QHBoxLayout()
+            line_edit = QLineEdit(initial)
+            browse_btn = QPushButton("Browse...")
+            browse_btn.clicked.connect(slot)
+            row_layout.addWidget(line_edit)
+            row_layout.addWidget(browse_btn)
+            return row_layout, line_edit
+        
+        # Input and output directory settings
+        input_layout, self.input_dir_edit = _make_dir_row(self.settings['input_dir'], self.browse_input_dir)
+        output_layout, self.output_dir_edit = _make_dir_row(self.settings['output_dir'], self.browse_output_dir)
+        
+        # Validate the input directory in the background whenever it changes or
+        # the dialog is shown, so saving can usually reuse the answer. Holds
+        # (path, is_dir) once known.
+        self._input_dir_valid = None
+        self.input_dir_edit.editingFinished.connect(self.check_input_dir)
         
         # Add to form layout
         layout.addRow("Input Images Directory:", input_layout)
@@ -67,27 +186,50 @@ class SettingsDialog(QDialog):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Input Directory", self.input_dir_edit.text())
         if dir_path:
             self.input_dir_edit.setText(dir_path)
+            self.check_input_dir()
     
     def browse_output_dir(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Output Directory", self.output_dir_edit.text())
         if dir_path:
             self.output_dir_edit.setText(dir_path)
     
+    def showEvent(self, event):
+        # The dialog is reused between opens, so drop any earlier result; the
+        # directory may have been removed since it was checked
+        super(SettingsDialog, self).showEvent(event)
+        self._input_dir_valid = None
+        self.check_input_dir()
+    
+    def check_input_dir(self):
+        job = _DirCheckJob(self.input_dir_edit.text())
+        job.signals.result.connect(self.on_input_dir_checked)
+        QThreadPool.globalInstance().start(job)
+    
+    def on_input_dir_checked(self, path, is_dir):
+        self._input_dir_valid = (path, is_dir)
+    
     def save_settings(self):
         # Get values from input fields
         input_dir = self.input_dir_edit.text()
         output_dir = self.output_dir_edit.text()
+        self.created_output_dir = None
         
-        # Validate directories
-        if not os.path.isdir(input_dir):
+        # Validate directories, checking synchronously if the background result
+        # is missing or was for a different path
+        if self._input_dir_valid is not None and self._input_dir_valid[0] == input_dir:
+            input_dir_ok = self._input_dir_valid[1]
+        else:
+            input_dir_ok = os.path.isdir(input_dir)
+        
+        if not input_dir_ok:
             QMessageBox.warning(self, "Invalid Directory", "Input directory does not exist!")
             return
             
         if not os.path.isdir(output_dir):
             try:
                 os.makedirs(output_dir)
-                QMessageBox.information(self, "Directory Created", f"Created output directory: {output_dir}")
-            except Exception as e:
+                self.created_output_dir = output_dir
+            except OSError as e:
                 QMessageBox.critical(self, "Error", f"Could not create output directory: {str(e)}")
                 return
         
@@ -96,31 +238,14 @@ class SettingsDialog(QDialog):
         self.settings['output_dir'] = output_dir
         
         # Write settings to file
-        try:
-            config_dir = os.path.expanduser("~/.config/text_recognition")
-            os.makedirs(config_dir, exist_ok=True)
-            
-            with open(os.path.join(config_dir, "settings.conf"), "w") as f:
-                for key, value in self.settings.items():
-                    f.write(f"{key}={value}\n")
-        except Exception as e:
-            QMessageBox.warning(self, "Settings Warning", f"Could not save settings: {str(e)}")
+        self.qs.setValue('input_dir', input_dir)
+        self.qs.setValue('output_dir', output_dir)
+        self.qs.sync()
+        if self.qs.status() != QSettings.NoError:
+            QMessageBox.warning(self, "Settings Warning", f"Could not save settings to {_CONFIG_FILE}")
         
         self.accept()
     
-    def load_settings(self):
-        try:
-            config_file = os.path.expanduser("~/.config/text_recognition/settings.conf")
-            if os.path.exists(config_file):
-                with open(config_file, "r") as f:
-                    for line in f:
-                        if "=" in line:
-                            key, value = line.strip().split("=", 1)
-                            self.settings[key] = value
-        except Exception:
-            # If any error occurs, use default settings
-            pass
-    
     def get_settings(self):
         return self.settings
 
@@ -133,12 +258,21 @@ class TextRecognitionApp(QMainWindow):
         self.setWindowTitle("Text Recognition")
         self.setGeometry(100, 100, 800, 600)
         
-        # Load settings
-        self.settings_dialog = SettingsDialog(self)
-        self.settings = self.settings_dialog.get_settings()
+        # Load settings; the dialog itself is only built when first opened
+        self.settings = load_settings_from_disk()
+        self.settings_dialog = None
         
-        # Selected image file
+        # Selected image file, plus its file name and name without extension
         self.selected_image = None
+        self._image_basename = None
+        self._image_stem = None
+        
+        # Directory of the last browsed image, reused as the next start directory
+        self._last_browse_dir = None
+        
+        # Saves run one at a time so two writes to the same file can't overlap
+        self._write_pool = QThreadPool(self)
+        self._write_pool.setMaxThreadCount(1)
         
         # Create UI
         self.init_ui()
@@ -215,25 +349,37 @@ class TextRecognitionApp(QMainWindow):
         self.setCentralWidget(central_widget)
     
     def open_settings(self):
+        if self.settings_dialog is None:
+            self.settings_dialog = SettingsDialog(self, initial_settings=self.settings)
+        
         if self.settings_dialog.exec_():
             self.settings = self.settings_dialog.get_settings()
-            self.statusBar().showMessage("Settings updated", 3000)
+            # Start the next image browse from the (possibly new) input directory
+            self._last_browse_dir = None
+            if self.settings_dialog.created_output_dir:
+                self.statusBar().showMessage(
+                    f"Settings updated. Created output directory: {self.settings_dialog.created_output_dir}", 3000)
+            else:
+                self.statusBar().showMessage("Settings updated", 3000)
     
     def browse_image(self):
-        options = QFileDialog.Options()
+        start_dir = self._last_browse_dir or self.settings['input_dir']
         file_path, _ = QFileDialog.getOpenFileName(
             self, 
             "Select Image File", 
-            self.settings['input_dir'],
-            "Image Files (*.png *.jpg *.jpeg *.bmp *.tiff);;All Files (*)", 
-            options=options
+            start_dir,
+            _IMAGE_FILTER, 
+            options=_IMAGE_FD_OPTIONS
         )
         
         if file_path:
             self.selected_image = file_path
+            self._last_browse_dir = os.path.dirname(file_path)
+            self._image_basename = os.path.basename(file_path)
+            self._image_stem = os.path.splitext(self._image_basename)[0]
             self.file_path_label.setText(file_path)
             self.run_button.setEnabled(True)
-            self.statusBar().showMessage(f"Selected: {os.path.basename(file_path)}", 3000)
+            self.statusBar().showMessage(f"Selected: {self._image_basename}", 3000)
     
     def run_recognition(self):
         if not self.selected_image:
@@ -244,21 +390,13 @@ class TextRecognitionApp(QMainWindow):
         # In a real app, this would call the OCR logic
         self.statusBar().showMessage("Processing image...", 2000)
         
-        # Generate random lorem ipsum paragraphs
-        lorem_paragraphs = [
-            "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Nullam in dui mauris. Vivamus hendrerit arcu sed erat molestie vehicula. Sed auctor neque eu tellus rhoncus ut eleifend nibh porttitor.",
-            "Ut in nulla enim. Phasellus molestie magna non est bibendum non venenatis nisl tempor. Suspendisse dictum feugiat nisl ut dapibus. Mauris iaculis porttitor posuere.",
-            "Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium, totam rem aperiam, eaque ipsa quae ab illo inventore veritatis et quasi architecto beatae vitae dicta sunt explicabo.",
-            "Nemo enim ipsam voluptatem quia voluptas sit aspernatur aut odit aut fugit, sed quia consequuntur magni dolores eos qui ratione voluptatem sequi nesciunt."
-        ]
-        
-        # Select 1-4 paragraphs randomly
+        # Select 1-4 paragraphs randomly (random is only needed here)
+        import random
         num_paragraphs = random.randint(1, 4)
-        selected_paragraphs = random.sample(lorem_paragraphs, num_paragraphs)
+        selected_paragraphs = random.sample(LOREM_PARAGRAPHS, num_paragraphs)
         
-        # Set text in result area
-        self.result_text.clear()
-        self.result_text.setText("\n\n".join(selected_paragraphs))
+        # Set text in result area (replaces any previous result)
+        self.result_text.setPlainText("\n\n".join(selected_paragraphs))
         
         # Enable save button
         self.save_button.setEnabled(True)
@@ -270,38 +408,38 @@ class TextRecognitionApp(QMainWindow):
         text = self.result_text.toPlainText()
         
         if not text:
-            QMessageBox.warning(self, "Error", "No text to save.")
+            self.statusBar().showMessage("No text to save", 3000)
             return
         
         # Create a default filename based on the image name
         if self.selected_image:
-            base_name = os.path.splitext(os.path.basename(self.selected_image))[0]
-            default_path = os.path.join(self.settings['output_dir'], f"{base_name}.txt")
+            default_path = os.path.join(self.settings['output_dir'], f"{self._image_stem}.txt")
         else:
             default_path = os.path.join(self.settings['output_dir'], "recognized_text.txt")
         
         # Ask where to save the file
-        options = QFileDialog.Options()
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Save Text File",
             default_path,
-            "Text Files (*.txt);;All Files (*)",
-            options=options
+            _TEXT_FILTER,
+            options=_FD_OPTIONS
         )
         
         if file_path:
-            try:
-                # Ensure directory exists
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                
-                # Write to file
-                with open(file_path, 'w') as f:
-                    f.write(text)
-                
-                self.statusBar().showMessage(f"Saved to {file_path}", 3000)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
+            # Write the file in the background; results are posted back via signals
+            job = _WriteJob(file_path, text)
+            job.signals.finished.connect(self.on_text_saved)
+            job.signals.error.connect(self.on_text_save_failed)
+            self._write_pool.start(job)
+            self.statusBar().showMessage(f"Saving to {file_path}...")
+    
+    def on_text_saved(self, file_path):
+        self.statusBar().showMessage(f"Saved to {file_path}", 3000)
+    
+    def on_text_save_failed(self, error):
+        self.statusBar().showMessage("Save failed", 3000)
+        QMessageBox.critical(self, "Error", f"Could not save file: {error}")
 
 
 if __name__ == "__main__":